@@ -1,5 +1,6 @@
 import databutton as db
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 from openai import OpenAI
 import json
@@ -66,7 +67,7 @@ Base your estimations on a standard, common serving size for the specified food.
 
 # --- API Endpoint ---
 
-@router.post("/chatgpt-food-lookup", response_model=ExtractedMacrosResponse)
+@router.post("/chatgpt-food-lookup", response_model=ExtractedMacrosResponse, response_class=ORJSONResponse)
 async def chatgpt_food_lookup(request: FoodLookupRequest):
     """
     Receives a food name, queries OpenAI (GPT model) to estimate its macronutrients
@@ -1,6 +1,8 @@
 import databutton as db
+import functools
 import re # Import regular expression module
 from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from google.cloud import vision
 from google.api_core.client_options import ClientOptions # Import ClientOptions
@@ -8,24 +10,140 @@ from typing import Optional
 from typing import Dict # Import Optional
 from google.api_core.exceptions import GoogleAPIError, ServiceUnavailable # Import necessary exceptions
 
-# Initialize Google Vision Client
+# --- Precompiled regex patterns ---
+# These run for every keyword on every OCR line, so compile them once at import
+# time instead of paying the re-cache lookup on each call.
+_RE_LT1G = re.compile(r"[<|less than]\s*1\s*g", re.IGNORECASE)
+_RE_GRAM = re.compile(r"(\d+(?:\.\d+)?|\.\d+)\s*g(?:ram|rams)?", re.IGNORECASE)
+_RE_NUM_NOT_G_PCT = re.compile(r"(\d+(?:\.\d+)?|\.\d+)(?!\s*(?:g|%))")
+_RE_NUM_NOT_PCT = re.compile(r"(\d+(?:\.\d+)?|\.\d+)(?!\s*[%])")
+_WS = " \t\r\n\f\v"
+
+
+def _is_word_char(c: str) -> bool:
+    return c.isalnum() or c == '_'
+
+
+def _has_zero_gram(seg: str) -> bool:
+    """Scans a lowercase segment for a zero-gram token ('0g', '0 g', 'og', 'zero g').
+
+    Equivalent to the regex \\b(?:0|o|zero)\\s*g\\b on the short lowercase
+    label fragments the parser produces, but as a plain character scan:
+    str.find plus a few index checks beats the regex engine on strings
+    this size.
+    """
+    n = len(seg)
+    i = seg.find('g')
+    while i != -1:
+        # the 'g' must end a word
+        if i + 1 >= n or not _is_word_char(seg[i + 1]):
+            # walk back over whitespace to the token before the 'g'
+            j = i - 1
+            while j >= 0 and seg[j] in _WS:
+                j -= 1
+            if j >= 0:
+                c = seg[j]
+                if c in '0o' and (j == 0 or not _is_word_char(seg[j - 1])):
+                    return True
+                if c == 'o' and j >= 3 and seg[j - 3:j + 1] == 'zero' and (j == 3 or not _is_word_char(seg[j - 4])):
+                    return True
+        i = seg.find('g', i + 1)
+    return False
+
+# Maps the common OCR misread of zero as the letter 'o' in a single pass.
+_OCR_ZERO_TABLE = str.maketrans({'o': '0', 'O': '0'})
+
+# Keyword variants (including common OCR misreads) for each nutrient field.
+_NUTRIENT_KEYWORDS = {
+    "total_fat": ["total fat", "total fal", "fat", "grasa total", "grasa"],
+    "protein": ["protein", "proteínas", "proteína"],
+    "total_carbohydrate": ["total carbohydrate", "carbohydrate", "carbohidrato total", "carbohidrato"],
+    "dietary_fiber": ["dietary fiber", "fiber", "fibra dietética", "fibra", "diary tiber", "deary her"],
+    "total_sugars": ["total sugars", "azúcares totales", "sugars", "azúcares"],
+    "servings": ["servings per container", "raciones por envase"],
+}
+
+# Field order used when packing parse results into a cacheable tuple.
+_NUTRIENT_FIELDS = tuple(_NUTRIENT_KEYWORDS)
+
+# Phrases labels use to mark a nutrient as effectively zero.
+_SIG_PHRASES = ("not a significant source", "insignificant source")
+
+# Nutrients eligible for the OCR misread heuristics (g read as trailing 0 / 9).
+_HEURISTIC_KEYS_G0 = frozenset({"total_carbohydrate", "dietary_fiber", "total_sugars"})
+_HEURISTIC_KEYS_G9 = frozenset({"protein", "total_fat", "total_carbohydrate", "dietary_fiber", "total_sugars"})
+
+# Explicit "total sugars" style terms get their own group so a line matching
+# them wins over a bare "sugars" hit earlier in the text.
+_PRIMARY_SUGAR_TERMS = ["total sugars", "azúcares totales"]
+
+
+def _keyword_group(name: str, terms: list[str]) -> str:
+    """Builds a named alternation group, longest terms first so they win at a shared prefix."""
+    ordered = sorted(terms, key=len, reverse=True)
+    return f"(?P<{name}>{'|'.join(re.escape(t) for t in ordered)})"
+
+
+# One union pattern over all keywords: a single scan per line replaces the
+# old per-key, per-term substring checks. Input is lowercased before matching.
+_KEYWORD_RE = re.compile(
+    "|".join(
+        [_keyword_group("total_sugars_primary", _PRIMARY_SUGAR_TERMS)]
+        + [_keyword_group(key, terms) for key, terms in _NUTRIENT_KEYWORDS.items()]
+    )
+)
+
+
+def _num_is_percent(seg: str, num_str: str) -> bool:
+    """Checks whether num_str appears in seg followed (after optional spaces) by '%'."""
+    i = seg.find(num_str)
+    while i != -1:
+        j = i + len(num_str)
+        while j < len(seg) and seg[j] == ' ':
+            j += 1
+        if j < len(seg) and seg[j] == '%':
+            return True
+        i = seg.find(num_str, i + 1)
+    return False
+
+# Google Vision Client configuration
 # NOTE: Make sure GOOGLE_VISION_API_KEY secret is set in Databutton
 gcp_api_key = db.secrets.get("GOOGLE_VISION_API_KEY")
 if not gcp_api_key:
     print("WARNING: GOOGLE_VISION_API_KEY secret not found. OCR endpoint will not work.")
-    vision_client = None
-else:
-    try:
-        # Correctly initialize the client using the API key via ClientOptions
-        client_options = ClientOptions(api_key=gcp_api_key)
-        vision_client = vision.ImageAnnotatorClient(client_options=client_options)
-        print("Google Vision client initialized successfully using API key.")
-    except Exception as e:
-        print(f"ERROR: Failed to initialize Google Vision client with API key: {e}")
-        vision_client = None
+
+vision_client = None
+
+
+def _get_vision_client():
+    """Returns the shared async Vision client, creating it on first use.
+
+    The client must be built lazily from inside a request handler: the
+    grpc.aio channel binds to the event loop that is current at construction
+    time, and this module is imported on an importer thread at boot where no
+    loop is running.
+    """
+    global vision_client
+    if vision_client is None and gcp_api_key:
+        try:
+            # Correctly initialize the client using the API key via ClientOptions.
+            # The async (gRPC aio) variant keeps the event loop free during the
+            # Vision round trip instead of blocking it for the whole call.
+            client_options = ClientOptions(api_key=gcp_api_key)
+            vision_client = vision.ImageAnnotatorAsyncClient(client_options=client_options)
+            print("Google Vision async client initialized successfully using API key.")
+        except Exception as e:
+            print(f"ERROR: Failed to initialize Google Vision client with API key: {e}")
+    return vision_client
 
 router = APIRouter()
 
+# Reject uploads above this size before reading them into memory.
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+
+# Image MIME types we will send to the Vision API.
+_ACCEPTED_MIMES = frozenset({"image/jpeg", "image/png", "image/webp", "image/heic"})
+
 class OcrResponse(BaseModel):
     """Response model containing the structured nutrient data extracted from the image."""
     protein: float
@@ -39,18 +157,18 @@ class OcrResponse(BaseModel):
 def find_nearest_number(text_segment: str, prioritize_grams: bool = True) -> Optional[float]:
     """Finds the first number (int or float) in a text segment, optionally prioritizing grams."""
     # Preprocessing: Replace common OCR errors for zero
-    processed_segment = text_segment.replace('o', '0').replace('O', '0')
+    processed_segment = text_segment.translate(_OCR_ZERO_TABLE)
     # print(f"      [find_nearest_number] Original Segment: '{text_segment}'") # Debug print removed
     # print(f"      [find_nearest_number] Processed Segment: '{processed_segment}'") # Debug print removed
 
     # Check for '<1' patterns first (using processed segment)
-    if re.search(r"[<|less than]\s*1\s*g", processed_segment, re.IGNORECASE):
+    if _RE_LT1G.search(processed_segment):
         # print("      [find_nearest_number] Match: Found '<1g' pattern -> 0.5") # Debug print removed
         return 0.5 # Treat '<1g' as 0.5g as a common convention
 
     # Priority 1: Look for numbers followed by 'g' or 'gram(s)' (case insensitive, using processed segment)
     if prioritize_grams:
-        gram_matches = re.findall(r"(\d+(?:\.\d+)?|\.\d+)\s*g(?:ram|rams)?", processed_segment, re.IGNORECASE)
+        gram_matches = _RE_GRAM.findall(processed_segment)
         # print(f"      [find_nearest_number] Gram Regex Matches (prioritized: {prioritize_grams}): {gram_matches}") # Debug print removed
         if gram_matches:
             try:
@@ -64,7 +182,7 @@ def find_nearest_number(text_segment: str, prioritize_grams: bool = True) -> Opt
         # print("      [find_nearest_number] Gram Regex Matches (prioritized: False): Skipped") # Debug print removed
 
     # Priority 2: Look for any digits, potentially with a decimal point (fallback, using processed segment)
-    numbers_not_g = re.findall(r"(\d+(?:\.\d+)?|\.\d+)(?!\s*(?:g|%))", processed_segment)
+    numbers_not_g = _RE_NUM_NOT_G_PCT.findall(processed_segment)
     if not prioritize_grams and numbers_not_g:
         # print(f"      [find_nearest_number] Fallback Num Regex (prioritize_grams=False, excluding g, %): {numbers_not_g}") # Debug print removed
         selected_value_str = None
@@ -90,16 +208,16 @@ def find_nearest_number(text_segment: str, prioritize_grams: bool = True) -> Opt
                 # print(f"      [find_nearest_number] Error: Could not convert fallback (not g, not %) number '{selected_value_str}' to float.") # Debug print removed
                 pass # Keep pass
 
-    all_numbers_general = re.findall(r"(\d+(?:\.\d+)?|\.\d+)(?!\s*[%])", processed_segment)
+    all_numbers_general = _RE_NUM_NOT_PCT.findall(processed_segment)
     # print(f"      [find_nearest_number] Fallback Num Regex (general, excluding %): {all_numbers_general}") # Debug print removed
     if all_numbers_general:
         try:
             num_str = all_numbers_general[0]
-            if re.search(re.escape(num_str) + r"\s*%", processed_segment):
+            if _num_is_percent(processed_segment, num_str):
                 # print(f"      [find_nearest_number] Info: Fallback number '{num_str}' appears to be part of a percentage (e.g., '{num_str}%'). Trying next if any.") # Debug print removed
                 if len(all_numbers_general) > 1:
                     num_str = all_numbers_general[1]
-                    if not re.search(re.escape(num_str) + r"\s*%", processed_segment):
+                    if not _num_is_percent(processed_segment, num_str):
                         # print(f"      [find_nearest_number] Match: Using second Fallback Value -> {float(num_str)}") # Debug print removed
                         return float(num_str)
                     # else: # This else block only contained a print
@@ -118,21 +236,13 @@ def find_nearest_number(text_segment: str, prioritize_grams: bool = True) -> Opt
     return None
 
 
-def parse_nutrition_text_proximity(text: str) -> dict[str, Optional[float]]:
-    """Parses raw OCR text using keyword proximity and structure to find nutrient values."""
+@functools.lru_cache(maxsize=256)
+def _parse_cached(text: str) -> tuple[float, ...]:
+    """Parses raw OCR text and returns the values in _NUTRIENT_FIELDS order."""
     processed_text = text.lower()
     # print("--- [parse_nutrition_text_proximity] Start Parsing ---") # F541 fix, and debug print removed
     # print(f"Input Text (lowercase, first 500 chars):\n{processed_text[:500]}") # Debug print removed
 
-    keywords = {
-        "total_fat": ["total fat", "total fal", "fat", "grasa total", "grasa"],
-        "protein": ["protein", "proteínas", "proteína"],
-        "total_carbohydrate": ["total carbohydrate", "carbohydrate", "carbohidrato total", "carbohidrato"],
-        "dietary_fiber": ["dietary fiber", "fiber", "fibra dietética", "fibra", "diary tiber", "deary her"], 
-        "total_sugars": ["total sugars", "azúcares totales", "sugars", "azúcares"], 
-        "servings": ["servings per container", "raciones por envase"] 
-    }
-
     extracted_data: Dict[str, float] = {
         "protein": 1.0, 
         "total_fat": 1.0,
@@ -142,167 +252,152 @@ def parse_nutrition_text_proximity(text: str) -> dict[str, Optional[float]]:
         "servings": 1.0, 
     }
 
-    lines = [line.strip() for line in processed_text.split('\n') if line.strip()]
+    # splitlines is one C call and the generator strips each line exactly once
+    lines = [s for s in (line.strip() for line in processed_text.splitlines()) if s]
     # print(f"Split into {len(lines)} non-empty lines.") # Debug print removed
 
     def check_for_explicit_zero(segment_after_keyword: str, line_where_keyword_found: str, next_line_text_for_zero_check: str) -> bool:
         """Checks for explicit zero patterns, prioritizing the segment immediately after the keyword."""
-        zero_patterns = [r"\b0\s*g\b", r"\bo\s*g\b", r"\bzero\s*g\b"]
-        
-        if segment_after_keyword:
-            for zero_pattern in zero_patterns:
-                if re.search(zero_pattern, segment_after_keyword, re.IGNORECASE):
-                    # print(f"      INFO: Explicit zero pattern '{zero_pattern}' found in segment_after_keyword: '{segment_after_keyword}'.") # Debug print removed
-                    return True
+        if segment_after_keyword and _has_zero_gram(segment_after_keyword):
+            # print(f"      INFO: Explicit zero found in segment_after_keyword: '{segment_after_keyword}'.") # Debug print removed
+            return True
+
+        if _has_zero_gram(line_where_keyword_found):
+            # print(f"      INFO: Explicit zero found on line_where_keyword_found: '{line_where_keyword_found}'.") # Debug print removed
+            return True
 
-        for zero_pattern in zero_patterns:
-            if re.search(zero_pattern, line_where_keyword_found, re.IGNORECASE):
-                # print(f"      INFO: Explicit zero pattern '{zero_pattern}' found on line_where_keyword_found: '{line_where_keyword_found}'.") # Debug print removed
-                return True
-        
         if not segment_after_keyword.strip():
-            if next_line_text_for_zero_check:
-                for zero_pattern in zero_patterns:
-                    if re.search(zero_pattern, next_line_text_for_zero_check, re.IGNORECASE):
-                        # print(f"      INFO: Explicit zero pattern '{zero_pattern}' found on next_line (keyword was at EOL): '{next_line_text_for_zero_check}'.") # Debug print removed
-                        return True
+            if next_line_text_for_zero_check and _has_zero_gram(next_line_text_for_zero_check):
+                # print(f"      INFO: Explicit zero found on next_line (keyword was at EOL): '{next_line_text_for_zero_check}'.") # Debug print removed
+                return True
         return False
 
-    # --- Main Nutrient Processing Loop --- #
-    for key, terms in keywords.items():
-        # print(f"\nProcessing Nutrient: [{key}] (Keywords: {', '.join(terms)})") # Debug print removed
-        keyword_found_on_line = -1
-        term = "" # Store the specific term that was matched
-        explicit_primary_keyword_found = False
+    def extract_value_for_key(key: str, keyword_end: int, keyword_found_on_line: int) -> None:
+        """Extracts and assigns the value for one nutrient whose keyword matched on the given line."""
         value_found_on_current_line_segment = False
         value_found_on_next_line = False
         segment_after_keyword = ""
         next_line_segment = ""
 
-        # Find the keyword line and specific term
-        if key == "total_sugars":
-            primary_sugar_terms = ["total sugars", "azúcares totales"]
-            for i_line, line_text in enumerate(lines):
-                for term_to_check in primary_sugar_terms:
-                    if term_to_check in line_text:
-                        keyword_found_on_line = i_line
-                        term = term_to_check
-                        explicit_primary_keyword_found = True
-                        # print(f"    -> Found PRIORITY keyword '{term}' for '{key}' on line {i_line}") # Debug print removed
-                        break
-                if explicit_primary_keyword_found:
-                    break
-            if not explicit_primary_keyword_found:
-                # print(f"    INFO: [{key}] Primary terms not found. Expanding search.") # Debug print removed
-                pass # Keep explicit pass for clarity after print removal
-        
-        if not explicit_primary_keyword_found:
-            for i, line_text in enumerate(lines):
-                for t in terms:
-                    if t in line_text:
-                        keyword_found_on_line = i
-                        term = t
-                        # print(f"    -> Found keyword '{term}' for '{key}' on line {i}") # Debug print removed
-                        break
-                if term:
-                    break
-        
-        if keyword_found_on_line != -1:
-            current_line_text = lines[keyword_found_on_line]
-            parsed_value_for_key: Optional[float] = None
+        current_line_text = lines[keyword_found_on_line]
+        parsed_value_for_key: Optional[float] = None
 
-            if key == "servings":
-                parsed_value_for_key = find_nearest_number(current_line_text, prioritize_grams=False)
-            else:
-                try:
-                    segment_after_keyword = current_line_text[current_line_text.find(term) + len(term):]
-                except TypeError: # term might not be found if logic error upstream
-                    segment_after_keyword = "" # Default to empty if term not found
-                    # print(f"    ERROR: Term '{term}' not found in line '{current_line_text}' for key '{key}'. This is unexpected.") # Error print removed, considered part of debug for now
-
-                parsed_value_for_key = find_nearest_number(segment_after_keyword)
-                if parsed_value_for_key is not None:
-                    value_found_on_current_line_segment = True
-                else:
-                    if keyword_found_on_line + 1 < len(lines):
-                        next_line_segment = lines[keyword_found_on_line+1]
-                        parsed_value_for_key = find_nearest_number(next_line_segment)
-                        if parsed_value_for_key is not None:
-                            value_found_on_next_line = True
-            
+        if key == "servings":
+            parsed_value_for_key = find_nearest_number(current_line_text, prioritize_grams=False)
+        else:
+            segment_after_keyword = current_line_text[keyword_end:]
+
+            parsed_value_for_key = find_nearest_number(segment_after_keyword)
             if parsed_value_for_key is not None:
-                # Apply heuristics if a number was parsed
-                if key in ["total_carbohydrate", "dietary_fiber", "total_sugars"] and parsed_value_for_key >= 10:
-                    # ... (g->0 heuristic, substantially the same) ...
-                    original_text_for_value = ""
-                    if value_found_on_current_line_segment:
-                        original_text_for_value = segment_after_keyword.strip()
-                    elif value_found_on_next_line:
-                        original_text_for_value = next_line_segment.strip()
-                    if original_text_for_value:
-                        parsed_value_int_str = str(int(parsed_value_for_key))
-                        if original_text_for_value == parsed_value_int_str and parsed_value_int_str.endswith('0'):
-                            corrected_value = parsed_value_for_key / 10
-                            # print(f"    -> HEURISTIC G->0 APPLIED: {parsed_value_for_key} -> {corrected_value}") # Debug print removed
-                            parsed_value_for_key = corrected_value
-
-                if key in ["protein", "total_fat", "total_carbohydrate", "dietary_fiber", "total_sugars"] and parsed_value_for_key is not None:
-                    # ... (g->9 heuristic, substantially the same) ...
-                    original_text_for_value_g9 = ""
-                    if value_found_on_current_line_segment:
-                        original_text_for_value_g9 = segment_after_keyword.strip()
-                    elif value_found_on_next_line:
-                        original_text_for_value_g9 = next_line_segment.strip()
-                    if original_text_for_value_g9:
-                        parsed_value_int_str_g9 = str(int(parsed_value_for_key))
-                        if original_text_for_value_g9 == parsed_value_int_str_g9 and original_text_for_value_g9.endswith('9') and len(original_text_for_value_g9) > 1:
-                            try:
-                                corrected_value_g9 = float(original_text_for_value_g9[:-1])
-                                # print(f"    -> HEURISTIC G->9 APPLIED: {parsed_value_for_key} -> {corrected_value_g9}") # Debug print removed
-                                parsed_value_for_key = corrected_value_g9
-                            except ValueError:
-                                pass # Ignore conversion error for G9 heuristic
-
-                extracted_data[key] = parsed_value_for_key
-                # print(f"      SUCCESS: Assigned PARSED value {extracted_data[key]} to '{key}'.") # Debug print removed
+                value_found_on_current_line_segment = True
             else:
-                # No number parsed, check for explicit zero
-                # print(f"    -> INFO: No number parsed for '{key}'. Checking for explicit zero.") # Debug print removed
-                line_where_keyword_was_found = lines[keyword_found_on_line]
-                next_line_for_zero_check = lines[keyword_found_on_line+1] if keyword_found_on_line + 1 < len(lines) else ""
-                
-                if check_for_explicit_zero(segment_after_keyword, line_where_keyword_was_found, next_line_for_zero_check):
-                    extracted_data[key] = 0.0
-                    # print(f"      SUCCESS: Assigned EXPLICIT ZERO 0.0 to '{key}'.") # Debug print removed
-                else:
-                    significant_source_phrases = ["not a significant source", "insignificant source"]
-                    source_phrase_found = False
-                    for phrase in significant_source_phrases:
-                        if phrase in line_where_keyword_was_found.lower() or phrase in next_line_for_zero_check.lower():
-                            extracted_data[key] = 0.0
-                            # print(f"      INFO: Found zero phrase '{phrase}' for '{key}'. Assigning 0.0.") # Debug print removed
-                            source_phrase_found = True
-                            break
-                    if not source_phrase_found:
-                        # print(f"    -> INFO: No explicit zero for '{key}'. Remains default {extracted_data.get(key)}.") # Debug print removed
-                        pass # Keep explicit pass for clarity
+                if keyword_found_on_line + 1 < len(lines):
+                    next_line_segment = lines[keyword_found_on_line+1]
+                    parsed_value_for_key = find_nearest_number(next_line_segment)
+                    if parsed_value_for_key is not None:
+                        value_found_on_next_line = True
+
+        if parsed_value_for_key is not None:
+            # Apply heuristics if a number was parsed. The original OCR text
+            # for the value only matters when it was exactly a bare integer.
+            original_text_for_value = ""
+            if value_found_on_current_line_segment:
+                original_text_for_value = segment_after_keyword.strip()
+            elif value_found_on_next_line:
+                original_text_for_value = next_line_segment.strip()
+
+            if key in _HEURISTIC_KEYS_G0 and parsed_value_for_key >= 10 and original_text_for_value:
+                # g->0 heuristic: a trailing 'g' misread as '0' (e.g. '4g' -> '40')
+                if (parsed_value_for_key.is_integer()
+                        and int(parsed_value_for_key) % 10 == 0
+                        and original_text_for_value == str(int(parsed_value_for_key))):
+                    # print(f"    -> HEURISTIC G->0 APPLIED: {parsed_value_for_key} -> {parsed_value_for_key / 10}") # Debug print removed
+                    parsed_value_for_key = parsed_value_for_key / 10
+
+            if key in _HEURISTIC_KEYS_G9 and original_text_for_value:
+                # g->9 heuristic: a trailing 'g' misread as '9' (e.g. '2g' -> '29')
+                value_as_int = int(parsed_value_for_key)
+                if (parsed_value_for_key.is_integer()
+                        and value_as_int % 10 == 9
+                        and value_as_int >= 10
+                        and original_text_for_value == str(value_as_int)):
+                    # print(f"    -> HEURISTIC G->9 APPLIED: {parsed_value_for_key} -> {float(value_as_int // 10)}") # Debug print removed
+                    parsed_value_for_key = float(value_as_int // 10)
+
+            extracted_data[key] = parsed_value_for_key
+            # print(f"      SUCCESS: Assigned PARSED value {extracted_data[key]} to '{key}'.") # Debug print removed
         else:
-            # print(f"    WARNING: No keyword found for '{key}'. Remains default {extracted_data[key]}.") # This is a useful warning, but for now treating as debug remove. Consider re-adding if issues arise.
-            pass # Keep explicit pass for clarity
-        
+            # No number parsed, check for explicit zero
+            # print(f"    -> INFO: No number parsed for '{key}'. Checking for explicit zero.") # Debug print removed
+            line_where_keyword_was_found = lines[keyword_found_on_line]
+            next_line_for_zero_check = lines[keyword_found_on_line+1] if keyword_found_on_line + 1 < len(lines) else ""
+
+            if check_for_explicit_zero(segment_after_keyword, line_where_keyword_was_found, next_line_for_zero_check):
+                extracted_data[key] = 0.0
+                # print(f"      SUCCESS: Assigned EXPLICIT ZERO 0.0 to '{key}'.") # Debug print removed
+            else:
+                # lines are already lowercased, so no per-phrase .lower() needed
+                source_phrase_found = False
+                for phrase in _SIG_PHRASES:
+                    if phrase in line_where_keyword_was_found or phrase in next_line_for_zero_check:
+                        extracted_data[key] = 0.0
+                        # print(f"      INFO: Found zero phrase '{phrase}' for '{key}'. Assigning 0.0.") # Debug print removed
+                        source_phrase_found = True
+                        break
+                if not source_phrase_found:
+                    # print(f"    -> INFO: No explicit zero for '{key}'. Remains default {extracted_data.get(key)}.") # Debug print removed
+                    pass # Keep explicit pass for clarity
+
         # print(f"-> Final value for [{key}]: {extracted_data[key]}") # Debug print removed
 
-    # print("--- [parse_nutrition_text_proximity] Finished --- Result: {extracted_data}") # Debug print removed
-    return extracted_data
+    # --- Main Nutrient Processing Loop --- #
+    # One forward pass over the lines: each keyword hit dispatches straight to
+    # value extraction and is removed from the outstanding set, so the scan
+    # stops as soon as every nutrient has been resolved.
+    pending = set(_NUTRIENT_KEYWORDS)
+    sugars_fallback: Optional[tuple[int, int]] = None
+    for i, line_text in enumerate(lines):
+        if not pending:
+            break
+        for m in _KEYWORD_RE.finditer(line_text):
+            key = m.lastgroup
+            if key == "total_sugars_primary":
+                key = "total_sugars"
+            elif key == "total_sugars":
+                # A bare 'sugars' hit only stands if no explicit 'total sugars'
+                # line appears anywhere later in the text.
+                if "total_sugars" in pending and sugars_fallback is None:
+                    sugars_fallback = (m.end(), i)
+                continue
+            if key in pending:
+                pending.discard(key)
+                extract_value_for_key(key, m.end(), i)
+
+    if "total_sugars" in pending and sugars_fallback is not None:
+        fallback_end, fallback_line = sugars_fallback
+        extract_value_for_key("total_sugars", fallback_end, fallback_line)
+
+    # print("--- [_parse_cached] Finished --- Result: {extracted_data}") # Debug print removed
+    return tuple(extracted_data[field] for field in _NUTRIENT_FIELDS)
+
+
+def parse_nutrition_text_proximity(text: str) -> dict[str, Optional[float]]:
+    """Parses raw OCR text using keyword proximity and structure to find nutrient values.
+
+    Results are memoized by the (whitespace-stripped) text, so retries and
+    duplicate uploads of the same label skip the full parse pipeline.
+    """
+    return dict(zip(_NUTRIENT_FIELDS, _parse_cached(text.strip())))
 
 
 
 # --- Endpoint definition ---
 
-@router.post("/process-label", response_model=OcrResponse)
+@router.post("/process-label", response_model=OcrResponse, response_class=ORJSONResponse)
 async def process_label(image: UploadFile):
     """Accepts an image file, performs OCR using Google Vision, and returns raw text."""
-    if vision_client is None:
+    client = _get_vision_client()
+    if client is None:
         print("ERROR: /process-label called but Google Vision client is not initialized.")
         raise HTTPException(
             status_code=500,
@@ -310,18 +405,40 @@ async def process_label(image: UploadFile):
         )
 
     try:
+        # Reject non-image uploads before reading them or spending Vision quota
+        if image.content_type not in _ACCEPTED_MIMES:
+            raise HTTPException(
+                status_code=415,
+                detail=f"Unsupported media type '{image.content_type}'. Expected one of: {', '.join(sorted(_ACCEPTED_MIMES))}."
+            )
+
+        # Reject oversized uploads before allocating a buffer for them
+        if image.size is not None and image.size > MAX_IMAGE_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Image file is too large (max {MAX_IMAGE_BYTES // (1024 * 1024)} MB)."
+            )
+
         # Read image content
         content = await image.read()
         if not content:
             raise HTTPException(status_code=400, detail="Received an empty image file.")
 
-        # Prepare image for Google Vision
+        # Prepare image for Google Vision, then drop our reference to the raw
+        # bytes so only the request buffer stays alive during the API call
         vision_image = vision.Image(content=content)
+        del content
 
-        # Perform text detection
-        # print(f"[process_label] Sending image ({len(content)} bytes) to Google Vision API...") # Debug print removed
+        # Perform text detection without blocking the event loop
+        # print("[process_label] Sending image to Google Vision API...") # Debug print removed
         try:
-            response = vision_client.text_detection(image=vision_image)
+            batch_response = await client.batch_annotate_images(
+                requests=[{
+                    "image": vision_image,
+                    "features": [{"type_": vision.Feature.Type.TEXT_DETECTION}],
+                }]
+            )
+            response = batch_response.responses[0]
             # print("[process_label] Received response from Google Vision API.") # Debug print removed
         except ServiceUnavailable as e:
             print(f"ERROR processing image in /process-label (Google Vision Service Unavailable): {e}")
@@ -370,16 +487,18 @@ async def process_label(image: UploadFile):
                 "servings": 1.0, 
             }
             # print("[process_label] No text detected. Returning default OcrResponse.") # Debug print removed
-            return OcrResponse(**default_data_for_empty_text) 
+            # model_construct skips validation; these literals are known-good floats
+            return OcrResponse.model_construct(**default_data_for_empty_text)
 
         # Parse the extracted text to get structured data
         # print("[process_label] Calling parser...") # Debug print removed
         parsed_data = parse_nutrition_text_proximity(extracted_text) # New proximity method
         # print(f"[process_label] Parser returned: {parsed_data}") # Debug print removed
         
-        # Return the structured data
+        # Return the structured data. The parser only ever emits floats, so
+        # model_construct can skip the Pydantic validation pass.
         # print("[process_label] Returning OcrResponse.") # Debug print removed
-        return OcrResponse(**parsed_data)
+        return OcrResponse.model_construct(**parsed_data)
 
     except HTTPException as http_exc:
         # Re-raise HTTPExceptions directly
@@ -1,7 +1,19 @@
+import functools
+import importlib
 import os
 import pathlib
 import json
 import dotenv
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+
+    def _loads(data: bytes) -> dict:
+        return orjson.loads(data)
+except ImportError:
+    def _loads(data: bytes) -> dict:
+        return json.loads(data)
 from fastapi import FastAPI, APIRouter, Depends
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -10,9 +22,11 @@ dotenv.load_dotenv()
 from databutton_app.mw.auth_mw import AuthConfig, get_authorized_user
 
 
+@functools.lru_cache(maxsize=1)
 def get_router_config() -> dict:
     try:
-        cfg = json.loads(open("routers.json").read())
+        with open("routers.json", "rb") as f:
+            cfg = _loads(f.read())
     except:
         return {"routers": {}}
     return cfg
@@ -26,31 +40,53 @@ def import_api_routers() -> APIRouter:
     routes = APIRouter(prefix="/routes")
     router_config = get_router_config()
 
+    # API packages live exactly one level below app/apis, so a flat scan is
+    # enough — no need for a recursive rglob walk at boot.
     apis_path = pathlib.Path(__file__).parent / "app" / "apis"
     api_names = [
-        p.parent.name
-        for p in apis_path.rglob("__init__.py")
-        if p.parent.is_dir()
+        p.name
+        for p in apis_path.iterdir()
+        if p.is_dir() and (p / "__init__.py").is_file()
     ]
     api_module_prefix = "app.apis."
 
-    for name in api_names:
+    def import_api_module(name: str):
         print(f"Importing API: {name}")
         try:
-            api_module = __import__(api_module_prefix + name, fromlist=["router"])
-            api_router = getattr(api_module, "router", None)
-            if isinstance(api_router, APIRouter):
-                routes.include_router(
-                    api_router,
-                    dependencies=(
-                        []
-                        if is_auth_disabled(router_config, name)
-                        else [Depends(get_authorized_user)]
-                    ),
-                )
+            return importlib.import_module(api_module_prefix + name)
         except Exception as e:
             print(f"Failed to import router for {name}: {e}")
+            return None
+
+    # Import the API modules in parallel: their heavy dependencies release
+    # the GIL during file I/O and C-extension init, so cold start is bounded
+    # by the slowest module instead of the sum of all of them.
+    #
+    # Imports run on worker threads with no event loop, so API modules must
+    # not create event-loop-bound resources (grpc.aio channels, async
+    # clients) at import time — defer those to first use in a request
+    # handler, as the ocr module does with its Vision client.
+    if api_names:
+        with ThreadPoolExecutor(max_workers=min(8, len(api_names))) as executor:
+            api_modules = list(executor.map(import_api_module, api_names))
+    else:
+        api_modules = []
+
+    # Router registration stays on the main thread; include_router is not
+    # thread-safe.
+    for name, api_module in zip(api_names, api_modules):
+        if api_module is None:
             continue
+        api_router = getattr(api_module, "router", None)
+        if isinstance(api_router, APIRouter):
+            routes.include_router(
+                api_router,
+                dependencies=(
+                    []
+                    if is_auth_disabled(router_config, name)
+                    else [Depends(get_authorized_user)]
+                ),
+            )
 
     return routes
 